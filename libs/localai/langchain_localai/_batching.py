@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import (
+    Awaitable,
+    Callable,
+    Generic,
+    List,
+    MutableMapping,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces concurrent async calls into batched calls.
+
+    Items submitted on the same event loop within ``window`` seconds from the
+    first pending one are passed to ``func`` together, at most ``max_size`` at
+    a time. ``func`` must return one result per item, in the same order.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[List[T]], Awaitable[List[R]]],
+        window: float,
+        max_size: int,
+    ) -> None:
+        self.func = func
+        self.window = window
+        self.max_size = max_size
+        self._pending: MutableMapping[
+            asyncio.AbstractEventLoop,
+            Tuple[List[Tuple[T, asyncio.Future[R]]], asyncio.TimerHandle],
+        ] = weakref.WeakKeyDictionary()
+        # the event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        if loop not in self._pending:
+            timer = loop.call_later(self.window, self._flush, loop)
+            self._pending[loop] = ([], timer)
+        pending, _ = self._pending[loop]
+        pending.append((item, future))
+        if len(pending) >= self.max_size:
+            self._flush(loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        pending, timer = self._pending.pop(loop, ([], None))
+        if timer is not None:
+            timer.cancel()
+        for i in range(0, len(pending), self.max_size):
+            task = loop.create_task(self._dispatch(pending[i : i + self.max_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[T, asyncio.Future[R]]]) -> None:
+        try:
+            results = await self.func([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from typing import (
+    TYPE_CHECKING,
     Any,
     Dict,
     List,
     Literal,
+    Mapping,
     Optional,
     Sequence,
     Set,
@@ -20,10 +24,41 @@ from langchain_core.utils import (
     get_pydantic_field_names,
     pre_init,
 )
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+
+from langchain_localai._batching import MicroBatcher
+from langchain_localai._cache import LRUCache
+
+if TYPE_CHECKING:
+    import numpy as np  # type: ignore[import-not-found]
 
 logger = logging.getLogger(__name__)
 
+# largest batch sent in one request, whatever chunk_size is
+_MAX_CHUNK_SIZE = 1000
+
+
+def _scatter(
+    size: int, batches: List[List[int]], embeddings: Sequence[List[List[float]]]
+) -> List[List[float]]:
+    """Put the embeddings of each batch back to the positions of its texts."""
+    results: List[List[float]] = [[] for _ in range(size)]
+    for batch, batch_embeddings in zip(batches, embeddings):
+        for i, embedding in zip(batch, batch_embeddings):
+            results[i] = embedding
+    return results
+
+
+def _expand(texts: List[str], by_text: Mapping[str, List[float]]) -> List[List[float]]:
+    """Look up the embedding of each text, copying it for repeated texts."""
+    seen: Set[str] = set()
+    results = []
+    for text in texts:
+        embedding = by_text[text]
+        results.append(list(embedding) if text in seen else embedding)
+        seen.add(text)
+    return results
+
 
 class LocalAIEmbeddings(BaseModel, Embeddings):
     """LocalAI embedding models.
@@ -60,9 +95,16 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
     allowed_special: Union[Literal["all"], Set[str]] = set()
     disallowed_special: Union[Literal["all"], Set[str], Sequence[str]] = "all"
     chunk_size: int = 1000
-    """Maximum number of texts to embed in each batch"""
+    """Maximum number of texts to embed in each batch, at most 1000"""
+    max_tokens_per_batch: int = 250_000
+    """Approximate maximum number of tokens to embed in each batch."""
+    max_concurrency: int = Field(default=8, ge=1)
+    """Maximum number of batches embedded concurrently by async calls."""
+    max_workers: int = Field(default=8, ge=1)
+    """Maximum number of threads embedding batches concurrently in sync calls."""
     max_retries: int = 6
-    """Maximum number of retries to make when generating."""
+    """Maximum number of retries to make when generating. Each batch of
+    ``embed_documents`` is retried on its own, keeping the other batches."""
     request_timeout: Optional[Union[float, Tuple[float, float]]] = None
     """Timeout in seconds for the LocalAI request."""
     headers: Any = None
@@ -70,6 +112,19 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
     """Whether to show a progress bar when embedding."""
     model_kwargs: Dict[str, Any] = Field(default_factory=dict)
     """Holds any model parameters valid for `create` call not explicitly specified."""
+    return_numpy: bool = False
+    """Whether ``embed_documents`` returns a float32 ``numpy.ndarray``, which is
+    several times smaller than a list of lists of floats. Requires ``numpy``."""
+    query_cache_size: int = 1024
+    """Maximum number of query embeddings kept in memory, 0 disables the cache."""
+    coalesce_ms: Optional[float] = None
+    """Window in milliseconds for batching concurrent ``aembed_query`` calls
+    into one request. Disabled by default, since it delays every call."""
+    max_coalesce_batch: int = 64
+    """Maximum number of ``aembed_query`` calls batched into one request."""
+
+    _query_cache: LRUCache[Tuple[str, str], Tuple[float, ...]] = PrivateAttr()
+    _query_batcher: MicroBatcher[str, List[float]] = PrivateAttr()
 
     model_config = ConfigDict(extra="forbid", protected_namespaces=())
 
@@ -184,13 +239,37 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
             )
         return values
 
+    def model_post_init(self, __context: Any) -> None:
+        self._query_cache = LRUCache(self.query_cache_size)
+        self._query_batcher = MicroBatcher(
+            self.aembed_queries,
+            window=(self.coalesce_ms or 0) / 1000,
+            max_size=self.max_coalesce_batch,
+        )
+
+    def _reset_private_state(self) -> None:
+        object.__setattr__(self, "__pydantic_private__", None)
+        self.model_post_init(None)
+
+    def __copy__(self) -> LocalAIEmbeddings:
+        copied = super().__copy__()
+        # a copy doesn't share the query cache and batcher of the original
+        copied._reset_private_state()
+        return copied
+
+    def model_copy(
+        self, *, update: Optional[Mapping[str, Any]] = None, deep: bool = False
+    ) -> LocalAIEmbeddings:
+        copied = super().model_copy(update=update, deep=deep)
+        if update:
+            # set up again for the updated fields, e.g. query_cache_size
+            copied._reset_private_state()
+        return copied
+
     @property
     def _invocation_params(self) -> Dict:
-        openai_args = {
-            "model": self.model,
-            **self.model_kwargs,
-        }
-        return openai_args
+        # built on access, model and model_kwargs may be reassigned
+        return {"model": self.model, **self.model_kwargs}
 
     def _embedding_func(
         self, text: str | list[str], *, engine: str
@@ -214,9 +293,49 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
         ).data
         return [d.embedding for d in list_of_embdes]
 
-    def embed_documents(
+    def _batch_indices(self, texts: List[str], chunk_size: int) -> List[List[int]]:
+        """Group positions of ``texts`` into batches of similarly sized texts.
+
+        Texts are packed shortest first, so that each batch holds at most
+        ``chunk_size`` texts, capped at 1000, and about
+        ``max_tokens_per_batch`` tokens.
+        """
+        chunk_size = min(chunk_size, _MAX_CHUNK_SIZE)
+        # a rough estimate: LocalAI models do not share a single tokenizer
+        lengths = [len(text) // 4 for text in texts]
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for i in sorted(range(len(texts)), key=lengths.__getitem__):
+            if batch and (
+                len(batch) >= chunk_size
+                or batch_tokens + lengths[i] > self.max_tokens_per_batch
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += lengths[i]
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _as_output(
+        self, embeddings: List[List[float]]
+    ) -> Union[List[List[float]], np.ndarray]:
+        if not self.return_numpy:
+            return embeddings
+        try:
+            import numpy as np  # type: ignore[import-not-found]
+        except ImportError as e:
+            raise ImportError(
+                "Could not import numpy python package. "
+                "Please install it with `pip install numpy`."
+            ) from e
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def embed_documents(  # type: ignore[override]
         self, texts: List[str], chunk_size: Optional[int] = 0
-    ) -> List[List[float]]:
+    ) -> Union[List[List[float]], np.ndarray]:
         """Call out to LocalAI's embedding endpoint for embedding search docs.
 
         Args:
@@ -225,14 +344,41 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
                 specified by the class.
 
         Returns:
-            List of embeddings, one for each text.
+            List of embeddings, one for each text. A float32 ``numpy.ndarray``
+            of shape ``(len(texts), dimensions)`` if ``return_numpy`` is set.
         """
-        # call _embedding_func for each text
-        return self._embedding_func(texts, engine=self.deployment)
+        return self._as_output(self._embed_documents(texts, chunk_size))
 
-    async def aembed_documents(
-        self, texts: List[str], chunk_size: Optional[int] = 0
+    def _embed_documents(
+        self, texts: List[str], chunk_size: Optional[int]
     ) -> List[List[float]]:
+        unique_texts = list(dict.fromkeys(texts))
+        if len(unique_texts) < len(texts):
+            # embed every distinct text once
+            unique_embeddings = self._embed_documents(unique_texts, chunk_size)
+            by_text = dict(zip(unique_texts, unique_embeddings))
+            return _expand(texts, by_text)
+        batches = self._batch_indices(texts, chunk_size or self.chunk_size)
+        if not batches:
+            return []
+        if len(batches) == 1:
+            return self._embedding_func(texts, engine=self.deployment)
+        # the threads share self.client, hence its connection pool
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self._embedding_func,
+                    [texts[i] for i in batch],
+                    engine=self.deployment,
+                )
+                for batch in batches
+            ]
+            embeddings = [future.result() for future in futures]
+        return _scatter(len(texts), batches, embeddings)
+
+    async def aembed_documents(  # type: ignore[override]
+        self, texts: List[str], chunk_size: Optional[int] = 0
+    ) -> Union[List[List[float]], np.ndarray]:
         """Call out to LocalAI's embedding endpoint async for embedding search docs.
 
         Args:
@@ -240,10 +386,101 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
             chunk_size: The chunk size of embeddings. If None, will use the chunk size
                 specified by the class.
 
+        Returns:
+            List of embeddings, one for each text. A float32 ``numpy.ndarray``
+            of shape ``(len(texts), dimensions)`` if ``return_numpy`` is set.
+        """
+        return self._as_output(await self._aembed_documents(texts, chunk_size))
+
+    async def _aembed_documents(
+        self, texts: List[str], chunk_size: Optional[int]
+    ) -> List[List[float]]:
+        unique_texts = list(dict.fromkeys(texts))
+        if len(unique_texts) < len(texts):
+            # embed every distinct text once
+            unique_embeddings = await self._aembed_documents(unique_texts, chunk_size)
+            by_text = dict(zip(unique_texts, unique_embeddings))
+            return _expand(texts, by_text)
+        batches = self._batch_indices(texts, chunk_size or self.chunk_size)
+        if not batches:
+            return []
+        if len(batches) == 1:
+            return await self._aembedding_func(texts, engine=self.deployment)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _embed_batch(batch: List[int]) -> List[List[float]]:
+            async with semaphore:
+                return await self._aembedding_func(
+                    [texts[i] for i in batch], engine=self.deployment
+                )
+
+        embeddings = await asyncio.gather(*(_embed_batch(b) for b in batches))
+        return _scatter(len(texts), batches, embeddings)
+
+    def _lookup_queries(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[Tuple[float, ...]]], List[str]]:
+        """Return cached embeddings of ``texts`` and the distinct texts missed."""
+        cached = [self._query_cache.get((self.model, text)) for text in texts]
+        missing = [text for text, hit in zip(texts, cached) if hit is None]
+        return cached, list(dict.fromkeys(missing))
+
+    def _merge_queries(
+        self,
+        texts: List[str],
+        cached: List[Optional[Tuple[float, ...]]],
+        missing: List[str],
+        embeddings: List[List[float]],
+    ) -> List[List[float]]:
+        """Cache the embeddings of ``missing`` and combine them with hits."""
+        fetched = dict(zip(missing, embeddings))
+        for text, embedding in fetched.items():
+            self._query_cache.put((self.model, text), tuple(embedding))
+        missed = [text for text, hit in zip(texts, cached) if hit is None]
+        fetched_embeddings = iter(_expand(missed, fetched))
+        return [
+            list(hit) if hit is not None else next(fetched_embeddings) for hit in cached
+        ]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Call out to LocalAI's embedding endpoint for embedding query texts.
+
+        Embedding many queries at once is much faster than calling
+        ``embed_query`` in a loop: all queries missing from the cache are sent
+        in a single request.
+
+        Args:
+            texts: The list of query texts to embed.
+
+        Returns:
+            List of embeddings, one for each text.
+        """
+        cached, missing = self._lookup_queries(texts)
+        embeddings = (
+            self._embedding_func(missing, engine=self.deployment) if missing else []
+        )
+        return self._merge_queries(texts, cached, missing, embeddings)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Call out to LocalAI's embedding endpoint async for embedding query texts.
+
+        Embedding many queries at once is much faster than calling
+        ``aembed_query`` in a loop: all queries missing from the cache are sent
+        in a single request.
+
+        Args:
+            texts: The list of query texts to embed.
+
         Returns:
             List of embeddings, one for each text.
         """
-        return await self._aembedding_func(texts, engine=self.deployment)
+        cached, missing = self._lookup_queries(texts)
+        embeddings = (
+            await self._aembedding_func(missing, engine=self.deployment)
+            if missing
+            else []
+        )
+        return self._merge_queries(texts, cached, missing, embeddings)
 
     def embed_query(self, text: str) -> List[float]:
         """Call out to LocalAI's embedding endpoint for embedding query text.
@@ -254,7 +491,7 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
         Returns:
             Embedding for the text.
         """
-        return self._embedding_func([text], engine=self.deployment)[0]
+        return self.embed_queries([text])[0]
 
     async def aembed_query(self, text: str) -> List[float]:
         """Call out to LocalAI's embedding endpoint async for embedding query text.
@@ -265,5 +502,9 @@ class LocalAIEmbeddings(BaseModel, Embeddings):
         Returns:
             Embedding for the text.
         """
-        embeddings = await self._aembedding_func([text], engine=self.deployment)
-        return embeddings[0]
+        if self.coalesce_ms is None:
+            return (await self.aembed_queries([text]))[0]
+        cached = self._query_cache.get((self.model, text))
+        if cached is not None:
+            return list(cached)
+        return await self._query_batcher.submit(text)
@@ -1,7 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import hashlib
+import heapq
+import importlib.util
+import json
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
-from typing import Any, Dict, List, Optional, Sequence, Union
+from email.utils import parsedate_to_datetime
+from operator import attrgetter, itemgetter
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import httpx
 from langchain_core.callbacks import Callbacks
@@ -9,10 +32,174 @@ from langchain_core.documents import BaseDocumentCompressor, Document
 from langchain_core.utils import get_from_dict_or_env
 from pydantic import Field, PrivateAttr, model_validator
 
+from langchain_localai._batching import MicroBatcher
+from langchain_localai._cache import LRUCache
+
+try:
+    import orjson
+
+    _HAS_ORJSON = True
+except ImportError:  # orjson is not installed on PyPy
+    _HAS_ORJSON = False
+
+
+def _json_dumps(data: Any) -> bytes:
+    if _HAS_ORJSON:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _json_loads(content: bytes) -> Any:
+    if _HAS_ORJSON:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+_HAS_H2 = importlib.util.find_spec("h2") is not None
+
+logger = logging.getLogger(__name__)
+
+_page_content = attrgetter("page_content")
+_relevance_score = itemgetter("relevance_score")
+
+
+def _document_texts(documents: Sequence[Union[str, Document, dict]]) -> List[Any]:
+    """Texts to send for rerank: strings and dicts are passed as they are."""
+    return [
+        _page_content(doc) if isinstance(doc, Document) else doc for doc in documents
+    ]
+
+
+def _text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+# model, query, top_n and the digests of the document texts
+_CacheKey = Tuple[str, str, Optional[int], Tuple[bytes, ...]]
+
+
+def _sort_by_length(texts: List[Any]) -> Tuple[List[int], List[Any]]:
+    """Sort texts by length, so the server pads them less when batching.
+
+    Returns the original position of every sorted text and the sorted texts.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    return order, [texts[i] for i in order]
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a rate limited request.
+
+    Honors the ``Retry-After`` header, given either in seconds or as a date,
+    and falls back to an exponential backoff.
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(
+                0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+            )
+        except (TypeError, ValueError):
+            pass
+    return min(0.5 * 2**attempt, 30.0)
+
+
+class _ResultsParser:
+    """Parses the ``results`` of a rerank response as its chunks arrive, so
+    the whole body is never buffered. Like a buffered response, the parsed
+    body only has a ``results`` key if the server sent one, and keeps the
+    error ``detail`` otherwise."""
+
+    def __init__(self) -> None:
+        try:
+            import ijson  # type: ignore[import-untyped, import-not-found]
+        except ImportError as e:
+            raise ImportError(
+                "Could not import ijson python package. "
+                "Please install it with `pip install ijson`."
+            ) from e
+        self._object_builder = ijson.ObjectBuilder
+        self._events = ijson.sendable_list()
+        self._coro = ijson.parse_coro(self._events, use_float=True)
+        self._builder: Any = None
+        self._detail: Any = None
+        self._body: Dict[str, Any] = {}
+
+    def feed(self, chunk: bytes) -> None:
+        self._coro.send(chunk)
+        self._consume()
+
+    def close(self) -> Dict[str, Any]:
+        self._coro.close()
+        self._consume()
+        if self._detail is not None:
+            self._body["detail"] = self._detail.value
+        return self._body
+
+    def _consume(self) -> None:
+        for prefix, event, value in self._events:
+            if prefix == "detail" or prefix.startswith("detail."):
+                if self._detail is None:
+                    self._detail = self._object_builder()
+                self._detail.event(event, value)
+            elif prefix == "results" and event == "start_array":
+                self._body["results"] = []
+            elif prefix == "results.item" and event == "start_map":
+                self._builder = self._object_builder()
+            if self._builder is not None:
+                self._builder.event(event, value)
+                if prefix == "results.item" and event == "end_map":
+                    self._body["results"].append(self._builder.value)
+                    self._builder = None
+        del self._events[:]
+
+
+class _RateLimiter:
+    """Spaces requests out to at most ``rate`` per second, across threads and
+    event loops."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+            return start - now
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 
 class LocalAIRerank(BaseDocumentCompressor):
     """Document compressor that uses LocalAI Rerank API
-    (supports sync and async calls)."""
+    (supports sync and async calls).
+
+    The HTTP clients are kept open between calls. Release them with
+    ``close()``/``aclose()``, or use the reranker as a context manager.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_localai import LocalAIRerank
+
+            with LocalAIRerank(openai_api_base="http://localhost:8080") as reranker:
+                reranked_docs = reranker.compress_documents(docs, query="foo")
+    """
 
     model: str = Field(default="jina-reranker-v1-base-en")
     """ Model deployed in LocalAI instance."""
@@ -22,10 +209,71 @@ class LocalAIRerank(BaseDocumentCompressor):
     openai_api_base: str = Field(default="")
     """ Just a LocalAI endpoint. While it has nothing with Open AI.
      It just mimics similar arguments in LocalAIEmbeddings"""
+    max_connections: int = Field(default=100, ge=1)
+    """ Maximum number of concurrent connections to the LocalAI endpoint."""
+    max_keepalive_connections: int = Field(default=20, ge=0)
+    """ Maximum number of idle connections kept open for reuse."""
+    keepalive_expiry: Optional[float] = Field(default=30.0, ge=0)
+    """ Seconds an idle connection is kept open for reuse."""
+    timeout_connect: float = Field(default=2.0, gt=0)
+    """ Seconds to wait for a connection, or for a free one in the pool."""
+    timeout_read: float = Field(default=60.0, gt=0)
+    """ Seconds to wait for the response, which includes model inference."""
+    timeout_write: float = Field(default=10.0, gt=0)
+    """ Seconds to wait for sending the request."""
+    http2: Optional[bool] = Field(default=None)
+    """ Negotiate HTTP/2 with https endpoints, multiplexing concurrent requests
+     over one connection. Requires ``h2`` (``langchain-localai[http2]``), by
+     default it is enabled whenever ``h2`` is installed."""
+    transport: Optional[httpx.BaseTransport] = Field(default=None, exclude=True)
+    """ Transport used by the sync client instead of httpx's connection pool,
+     e.g. ``httpx.MockTransport`` in tests. The connection limits and ``http2``
+     don't apply to it."""
+    async_transport: Optional[httpx.AsyncBaseTransport] = Field(
+        default=None, exclude=True
+    )
+    """ Transport used by the async client, like ``transport``."""
+    rerank_batch_size: int = Field(default=256, ge=1)
+    """ Maximum number of documents sent in one request. Larger inputs are
+     split, and the best ``top_n`` results of all requests are kept."""
+    max_concurrency: int = Field(default=4, ge=1)
+    """ Maximum number of requests sent concurrently by async calls."""
+    max_workers: int = Field(default=4, ge=1)
+    """ Maximum number of threads sending requests concurrently in sync calls."""
+    max_retries: int = Field(default=6, ge=0)
+    """ Maximum number of retries of a rate limited (429) request."""
+    rate_limit_per_sec: Optional[float] = Field(default=None, gt=0)
+    """ Maximum number of requests sent per second, unlimited by default."""
+    trust_server_ordering: bool = Field(default=True)
+    """ Whether the server returns results sorted by descending score, as
+     LocalAI does, so they are not sorted again. Set it to False for backends
+     which don't sort their results."""
+    stream_responses: bool = Field(default=False)
+    """ Parse responses incrementally as they are received instead of buffering
+     them, which lowers peak memory for large batches. Requires ``ijson``
+     (``langchain-localai[streaming]``)."""
+    cache_size: int = Field(default=128, ge=0)
+    """ Maximum number of ``compress_documents`` results kept in memory, keyed by
+     the query and the document texts. 0 disables the cache."""
+    coalesce_ms: Optional[float] = Field(default=None, ge=0)
+    """ Window in milliseconds for batching concurrent ``acompress_documents``
+     calls with the same query into one request. Disabled by default, since it
+     delays every call."""
+    max_coalesce_batch: int = Field(default=64, ge=1)
+    """ Maximum number of ``acompress_documents`` calls batched together."""
 
     # Private HTTP clients
     _sync_client: Optional[httpx.Client] = PrivateAttr(default=None)
-    _async_client: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+    # an async client per event loop, which its pooled connections belong to
+    _async_clients: MutableMapping[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+        PrivateAttr(default_factory=weakref.WeakKeyDictionary)
+    )
+    _client_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # openai_api_base and the rerank URL parsed from it
+    _rerank_url_cache: Optional[Tuple[str, httpx.URL]] = PrivateAttr(default=None)
+    _rate_limiter: Optional[_RateLimiter] = PrivateAttr(default=None)
+    _cache: LRUCache[_CacheKey, Tuple[Tuple[int, float], ...]] = PrivateAttr()
+    _batcher: MicroBatcher[Tuple[List[str], str], List[Dict[str, Any]]] = PrivateAttr()
 
     model_config = {
         "arbitrary_types_allowed": True,
@@ -44,95 +292,239 @@ class LocalAIRerank(BaseDocumentCompressor):
             )
         return data
 
+    def model_post_init(self, __context: Any) -> None:
+        if self.rate_limit_per_sec:
+            self._rate_limiter = _RateLimiter(self.rate_limit_per_sec)
+        self._cache = LRUCache(self.cache_size)
+        self._batcher = MicroBatcher(
+            self._rerank_coalesced,
+            window=(self.coalesce_ms or 0) / 1000,
+            max_size=self.max_coalesce_batch,
+        )
+
+    @property
+    def _rerank_url(self) -> httpx.URL:
+        # parsed once rather than by every request, and again only when
+        # openai_api_base is reassigned
+        cached = self._rerank_url_cache
+        if cached is None or cached[0] != self.openai_api_base:
+            url = httpx.URL(f"{self.openai_api_base.rstrip('/')}/v1/rerank")
+            cached = self._rerank_url_cache = (self.openai_api_base, url)
+        return cached[1]
+
+    def _client_params(self) -> Dict[str, Any]:
+        # built once per client, which sends them with every request, so
+        # a client created after openai_api_key is reassigned uses the new key
+        headers = {"Content-Type": "application/json"}
+        if self.openai_api_key:
+            headers["Authorization"] = f"Bearer {self.openai_api_key}"
+        return {
+            "headers": headers,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(
+                connect=self.timeout_connect,
+                read=self.timeout_read,
+                write=self.timeout_write,
+                pool=self.timeout_connect,
+            ),
+            "http2": _HAS_H2 if self.http2 is None else self.http2,
+        }
+
     def _get_sync_client(self) -> httpx.Client:
         if self._sync_client is None:
-            headers = {"Content-Type": "application/json"}
-            if self.openai_api_key:
-                headers["Authorization"] = f"Bearer {self.openai_api_key}"
-            self._sync_client = httpx.Client(headers=headers)
+            with self._client_lock:
+                if self._sync_client is None:
+                    self._sync_client = httpx.Client(
+                        transport=self.transport, **self._client_params()
+                    )
         return self._sync_client
 
     async def _get_async_client(self) -> httpx.AsyncClient:
-        if self._async_client is None:
-            headers = {"Content-Type": "application/json"}
-            if self.openai_api_key:
-                headers["Authorization"] = f"Bearer {self.openai_api_key}"
-            self._async_client = httpx.AsyncClient(headers=headers)
-        return self._async_client
+        # a client created on another (possibly closed) loop can't be reused,
+        # so every loop, e.g. of threads sharing the reranker, keeps its own
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            abandoned: List[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = []
+            # nothing is awaited while holding the lock, it only guards
+            # against event loops running in other threads
+            with self._client_lock:
+                client = self._async_clients.get(loop)
+                if client is None:
+                    # pooled connections keep their loop alive, so the clients
+                    # of closed loops, e.g. of past asyncio.run calls, are
+                    # dropped here rather than by the weak references
+                    for old_loop in list(self._async_clients):
+                        if old_loop.is_closed():
+                            abandoned.append(
+                                (old_loop, self._async_clients.pop(old_loop))
+                            )
+                    client = httpx.AsyncClient(
+                        transport=self.async_transport, **self._client_params()
+                    )
+                    self._async_clients[loop] = client
+            await self._aclose_clients(abandoned)
+        return client
 
-    def _rerank_sync(
+    def _resolve_top_n(self, top_n: Optional[int]) -> Optional[int]:
+        return top_n if top_n is not None and top_n > 0 else self.top_n
+
+    def _base_payload(
+        self, model: Optional[str] = None, top_n: Optional[int] = None
+    ) -> Dict[str, Any]:
+        # resolved once per call and shared by its batches, rather than once
+        # per reranker, since model and top_n may be reassigned
+        return {"model": model or self.model, "top_n": self._resolve_top_n(top_n)}
+
+    def _merge_results(
         self,
-        documents: Sequence[Union[str, Document, dict]],
+        responses: Sequence[Any],
+        order: List[int],
+        top_n: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        for batch, resp in enumerate(responses):
+            if "results" not in resp:
+                raise RuntimeError(resp.get("detail", "Unknown error from rerank API"))
+            offset = batch * self.rerank_batch_size
+            # map indices of the sorted documents back to the given ones,
+            # updating the parsed results rather than copying them
+            for r in resp["results"]:
+                r["index"] = order[offset + r["index"]]
+            results.extend(resp["results"])
+        if len(responses) == 1:
+            return results
+        resolved_top_n = self._resolve_top_n(top_n)
+        if resolved_top_n is None:
+            return sorted(results, key=_relevance_score, reverse=True)
+        return heapq.nlargest(resolved_top_n, results, key=_relevance_score)
+
+    def _post_rerank_sync(self, data: Dict[str, Any]) -> Any:
+        client = self._get_sync_client()
+        request = client.build_request(
+            "POST", self._rerank_url, content=_json_dumps(data)
+        )
+        for attempt in range(self.max_retries + 1):
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            response = client.send(request, stream=self.stream_responses)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            response.close()
+            time.sleep(_retry_delay(response, attempt))
+        try:
+            response.raise_for_status()
+            if not self.stream_responses:
+                return _json_loads(response.content)
+            parser = _ResultsParser()
+            for chunk in response.iter_bytes():
+                parser.feed(chunk)
+            return parser.close()
+        finally:
+            response.close()
+
+    async def _post_rerank_async(self, data: Dict[str, Any]) -> Any:
+        client = await self._get_async_client()
+        request = client.build_request(
+            "POST", self._rerank_url, content=_json_dumps(data)
+        )
+        for attempt in range(self.max_retries + 1):
+            if self._rate_limiter is not None:
+                await self._rate_limiter.aacquire()
+            response = await client.send(request, stream=self.stream_responses)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            await response.aclose()
+            await asyncio.sleep(_retry_delay(response, attempt))
+        try:
+            response.raise_for_status()
+            if not self.stream_responses:
+                return _json_loads(response.content)
+            parser = _ResultsParser()
+            async for chunk in response.aiter_bytes():
+                parser.feed(chunk)
+            return parser.close()
+        finally:
+            await response.aclose()
+
+    def _rerank_texts_sync(
+        self,
+        texts: List[Any],
         query: str,
         model: Optional[str] = None,
         top_n: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        if not documents:
+        if not texts:
             return []
 
-        docs = [
-            doc.page_content if isinstance(doc, Document) else doc for doc in documents
-        ]
-        resolved_model = model or self.model
-        resolved_top_n = top_n if top_n is not None and top_n > 0 else self.top_n
-
-        data = {
-            "query": query,
-            "documents": docs,
-            "model": resolved_model,
-            "top_n": resolved_top_n,
-        }
-
-        client = self._get_sync_client()
-        url = f"{self.openai_api_base.rstrip('/')}/v1/rerank"
-        response = client.post(url, json=data)
-        response.raise_for_status()
-        resp = response.json()
-
-        if "results" not in resp:
-            raise RuntimeError(resp.get("detail", "Unknown error from rerank API"))
-
-        return [
-            {"index": r["index"], "relevance_score": r["relevance_score"]}
-            for r in resp["results"]
+        order, sorted_texts = _sort_by_length(texts)
+        size = self.rerank_batch_size
+        base = self._base_payload(model, top_n)
+        payloads = [
+            {"query": query, "documents": sorted_texts[i : i + size], **base}
+            for i in range(0, len(sorted_texts), size)
         ]
+        if len(payloads) == 1:
+            return self._merge_results(
+                [self._post_rerank_sync(payloads[0])], order, top_n
+            )
+        # the threads share the sync client, hence its connection pool
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            responses = list(executor.map(self._post_rerank_sync, payloads))
+        return self._merge_results(responses, order, top_n)
 
-    async def _rerank_async(
+    async def _rerank_texts_async(
         self,
-        documents: Sequence[Union[str, Document, dict]],
+        texts: List[Any],
         query: str,
         model: Optional[str] = None,
         top_n: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        if not documents:
+        if not texts:
             return []
 
-        docs = [
-            doc.page_content if isinstance(doc, Document) else doc for doc in documents
-        ]
-        resolved_model = model or self.model
-        resolved_top_n = top_n if top_n is not None and top_n > 0 else self.top_n
-
-        data = {
-            "query": query,
-            "documents": docs,
-            "model": resolved_model,
-            "top_n": resolved_top_n,
-        }
+        order, sorted_texts = _sort_by_length(texts)
+        size = self.rerank_batch_size
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        base = self._base_payload(model, top_n)
 
-        client = await self._get_async_client()
-        url = f"{self.openai_api_base.rstrip('/')}/v1/rerank"
-        response = await client.post(url, json=data)
-        response.raise_for_status()
-        resp = response.json()
+        async def _post_batch(batch: List[Any]) -> Any:
+            async with semaphore:
+                return await self._post_rerank_async(
+                    {"query": query, "documents": batch, **base}
+                )
 
-        if "results" not in resp:
-            raise RuntimeError(resp.get("detail", "Unknown error from rerank API"))
+        responses = await asyncio.gather(
+            *(
+                _post_batch(sorted_texts[i : i + size])
+                for i in range(0, len(sorted_texts), size)
+            )
+        )
+        return self._merge_results(responses, order, top_n)
 
-        return [
-            {"index": r["index"], "relevance_score": r["relevance_score"]}
-            for r in resp["results"]
-        ]
+    def _rerank_sync(
+        self,
+        documents: Sequence[Union[str, Document, dict]],
+        query: str,
+        model: Optional[str] = None,
+        top_n: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._rerank_texts_sync(_document_texts(documents), query, model, top_n)
+
+    async def _rerank_async(
+        self,
+        documents: Sequence[Union[str, Document, dict]],
+        query: str,
+        model: Optional[str] = None,
+        top_n: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        return await self._rerank_texts_async(
+            _document_texts(documents), query, model, top_n
+        )
 
     def compress_documents(
         self,
@@ -140,7 +532,15 @@ class LocalAIRerank(BaseDocumentCompressor):
         query: str,
         callbacks: Optional[Callbacks] = None,
     ) -> Sequence[Document]:
-        results = self._rerank_sync(documents, query)
+        if len(documents) == 1:
+            return self._build_single_doc(documents[0])
+        # documents are known to be Documents, no need for type checks
+        texts = list(map(_page_content, documents))
+        key = self._cache_key(texts, query)
+        results = self._cached_results(key)
+        if results is None:
+            results = self._rerank_texts_sync(texts, query)
+            self._cache_results(key, results)
         return self._build_compressed_docs(documents, results)
 
     async def acompress_documents(
@@ -149,29 +549,190 @@ class LocalAIRerank(BaseDocumentCompressor):
         query: str,
         callbacks: Optional[Callbacks] = None,
     ) -> Sequence[Document]:
-        results = await self._rerank_async(documents, query)
+        if len(documents) == 1:
+            return self._build_single_doc(documents[0])
+        texts = list(map(_page_content, documents))
+        key = self._cache_key(texts, query)
+        results = self._cached_results(key)
+        if results is None:
+            if self.coalesce_ms is None:
+                results = await self._rerank_texts_async(texts, query)
+            else:
+                results = await self._batcher.submit((texts, query))
+            self._cache_results(key, results)
         return self._build_compressed_docs(documents, results)
 
+    async def _rerank_coalesced(
+        self, calls: List[Tuple[List[str], str]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Rerank the texts of all calls with the same query in one go.
+
+        All the scores are requested, so each call gets its best ``top_n``
+        results among its own texts.
+        """
+        by_query: Dict[str, List[int]] = {}
+        for i, (_, query) in enumerate(calls):
+            by_query.setdefault(query, []).append(i)
+
+        out: List[List[Dict[str, Any]]] = [[] for _ in calls]
+        top_n = self._resolve_top_n(None)
+
+        async def _rerank_query(query: str, indices: List[int]) -> None:
+            texts: List[str] = []
+            # the call every text comes from, and its index in that call
+            owners: List[Tuple[int, int]] = []
+            for i in indices:
+                texts.extend(calls[i][0])
+                owners.extend((i, j) for j in range(len(calls[i][0])))
+            results = await self._rerank_texts_async(texts, query, top_n=len(texts))
+            per_call: Dict[int, List[Dict[str, Any]]] = {i: [] for i in indices}
+            for res in results:
+                i, res["index"] = owners[res["index"]]
+                per_call[i].append(res)
+            for i in indices:
+                if top_n is None:
+                    out[i] = sorted(per_call[i], key=_relevance_score, reverse=True)
+                else:
+                    out[i] = heapq.nlargest(top_n, per_call[i], key=_relevance_score)
+
+        await asyncio.gather(
+            *(_rerank_query(query, indices) for query, indices in by_query.items())
+        )
+        return out
+
+    def _cache_key(self, texts: List[str], query: str) -> Optional[_CacheKey]:
+        if self.cache_size <= 0:
+            return None
+        return (
+            self.model,
+            query,
+            self._resolve_top_n(None),
+            tuple(map(_text_digest, texts)),
+        )
+
+    def _cached_results(
+        self, key: Optional[_CacheKey]
+    ) -> Optional[List[Dict[str, Any]]]:
+        hit = self._cache.get(key) if key is not None else None
+        if hit is None:
+            return None
+        return [{"index": index, "relevance_score": score} for index, score in hit]
+
+    def _cache_results(
+        self, key: Optional[_CacheKey], results: List[Dict[str, Any]]
+    ) -> None:
+        if key is not None:
+            self._cache.put(
+                key, tuple((res["index"], res["relevance_score"]) for res in results)
+            )
+
     def _build_compressed_docs(
         self, documents: Sequence[Document], results: List[Dict[str, Any]]
     ) -> List[Document]:
+        if not self.trust_server_ordering or logger.isEnabledFor(logging.DEBUG):
+            scores = list(map(_relevance_score, results))
+            # results are usually sorted already, checking is cheaper than sorting
+            if any(a < b for a, b in zip(scores, scores[1:])):
+                if self.trust_server_ordering:
+                    logger.debug(
+                        "Rerank results are not sorted by relevance_score, "
+                        "consider setting trust_server_ordering=False"
+                    )
+                else:
+                    results = sorted(results, key=_relevance_score, reverse=True)
         compressed = []
         for res in results:
             original_doc = documents[res["index"]]
             new_doc = Document(
                 page_content=original_doc.page_content,
-                metadata=deepcopy(original_doc.metadata),
+                metadata={
+                    **original_doc.metadata,
+                    "relevance_score": res["relevance_score"],
+                },
             )
-            new_doc.metadata["relevance_score"] = res["relevance_score"]
             compressed.append(new_doc)
         return compressed
 
+    def _build_single_doc(self, document: Document) -> List[Document]:
+        # a single document can't be reordered, so it isn't worth a request
+        return [
+            document.model_copy(
+                update={"metadata": {**document.metadata, "relevance_score": 1.0}}
+            )
+        ]
+
+    def __getstate__(self) -> Dict[Any, Any]:
+        state = super().__getstate__()
+        # clients, locks and caches belong to this instance and can't be
+        # pickled, an unpickled or copied reranker creates its own
+        state["__pydantic_private__"] = None
+        return state
+
+    def __setstate__(self, state: Dict[Any, Any]) -> None:
+        super().__setstate__(state)
+        self._reset_private_state()
+
+    def _reset_private_state(self) -> None:
+        object.__setattr__(self, "__pydantic_private__", None)
+        self.model_post_init(None)
+
+    def __copy__(self) -> LocalAIRerank:
+        copied = super().__copy__()
+        # a copy doesn't share the clients, cache and pacing of the original
+        copied._reset_private_state()
+        return copied
+
+    def model_copy(
+        self, *, update: Optional[Mapping[str, Any]] = None, deep: bool = False
+    ) -> LocalAIRerank:
+        copied = super().model_copy(update=update, deep=deep)
+        if update:
+            # set up again for the updated fields, e.g. openai_api_key
+            copied._reset_private_state()
+        return copied
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> LocalAIRerank:
+        copied = self.__class__.__new__(self.__class__)
+        copied.__setstate__(deepcopy(self.__getstate__(), memo))
+        return copied
+
     def close(self) -> None:
         if self._sync_client is not None:
             self._sync_client.close()
             self._sync_client = None
 
     async def aclose(self) -> None:
-        if self._async_client is not None:
-            await self._async_client.aclose()
-            self._async_client = None
+        with self._client_lock:
+            clients = list(self._async_clients.items())
+            self._async_clients.clear()
+        await self._aclose_clients(clients)
+
+    async def _aclose_clients(
+        self, clients: List[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]]
+    ) -> None:
+        current = asyncio.get_running_loop()
+        for loop, client in clients:
+            if loop is not current and loop.is_running():
+                # the loop runs in another thread, close the client there
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                )
+            else:
+                # the connections of a closed loop can only be dropped from
+                # the pool, their sockets are closed once they are collected
+                with contextlib.suppress(RuntimeError):
+                    await client.aclose()
+
+    def __enter__(self) -> LocalAIRerank:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> LocalAIRerank:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        # a reranker used with `async with` may have served sync calls too
+        self.close()
+        await self.aclose()
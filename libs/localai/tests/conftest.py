@@ -0,0 +1,18 @@
+import asyncio
+
+import pytest
+
+try:
+    # imported before pytest-socket disables sockets, as uvloop keeps a
+    # reference to socket.socket
+    import uvloop
+except ImportError:
+    uvloop = None  # type: ignore[assignment]
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy() -> asyncio.AbstractEventLoopPolicy:
+    # uvloop only speeds the tests up, they run on the default loop without it
+    if uvloop is None:
+        return asyncio.get_event_loop_policy()
+    return uvloop.EventLoopPolicy()
@@ -0,0 +1,15 @@
+from typing import Any, Dict
+
+import pytest
+from vcr import VCR  # type: ignore[import-untyped]
+
+
+@pytest.fixture(scope="module")
+def vcr_config() -> Dict[str, Any]:
+    # JSON cassettes with decoded bodies replay much faster than gzipped YAML
+    return {
+        "serializer": "json",
+        "path_transformer": VCR.ensure_suffix(".json"),
+        "decode_compressed_response": True,
+        "match_on": ["method", "scheme", "host", "port", "path", "query", "body"],
+    }
@@ -1,17 +1,27 @@
+from typing import AsyncIterator
+
 import pytest
+import pytest_asyncio
 from langchain_core.documents import Document
 
 from langchain_localai import LocalAIRerank
 
 
-@pytest.mark.vcr
-def test_localai_rerank_sync() -> None:
-    reranker = LocalAIRerank(
+@pytest_asyncio.fixture(scope="module")
+async def reranker() -> AsyncIterator[LocalAIRerank]:
+    """A reranker shared by the tests of this module, reusing its connections."""
+    async with LocalAIRerank(
         openai_api_key="foo",
         model="bge-reranker-v2-m3",
         openai_api_base="https://foo.bar/",
-    )
+        # the sync and async tests rerank the same documents
+        cache_size=0,
+    ) as reranker:
+        yield reranker
+
 
+@pytest.mark.vcr
+def test_localai_rerank_sync(reranker: LocalAIRerank) -> None:
     docs = [
         Document(page_content="foo bar"),
         Document(page_content="moo foo"),
@@ -36,17 +46,9 @@ def test_localai_rerank_sync() -> None:
     if len(scores) > 1:
         assert all(scores[i] >= scores[i + 1] for i in range(len(scores) - 1))
 
-    reranker.close()
-
 
 @pytest.mark.vcr
-async def test_localai_rerank_async() -> None:
-    reranker = LocalAIRerank(
-        openai_api_key="foo",
-        model="bge-reranker-v2-m3",
-        openai_api_base="https://foo.bar/",
-    )
-
+async def test_localai_rerank_async(reranker: LocalAIRerank) -> None:
     docs = [
         Document(page_content="foo bar"),
         Document(page_content="moo foo"),
@@ -71,18 +73,10 @@ async def test_localai_rerank_async() -> None:
     if len(scores) > 1:
         assert all(scores[i] >= scores[i + 1] for i in range(len(scores) - 1))
 
-    await reranker.aclose()
-
 
 # @pytest.mark.vcr
 @pytest.mark.skip  # odd but https://github.com/mudler/LocalAI/issues/6700
-def test_localai_rerank_internal_top_n_sync() -> None:
-    reranker = LocalAIRerank(
-        openai_api_key="foo",
-        model="bge-reranker-v2-m3",
-        openai_api_base="https://foo.bar/",
-    )
-
+def test_localai_rerank_internal_top_n_sync(reranker: LocalAIRerank) -> None:
     raw_docs = ["foo bar", "moo foo", "another document"]
     # Use the internal API to control top_n
     res = reranker._rerank_sync(raw_docs, query="foo", top_n=1)
@@ -93,18 +87,10 @@ def test_localai_rerank_internal_top_n_sync() -> None:
     assert isinstance(entry["index"], int)
     assert isinstance(entry["relevance_score"], (float, int))
 
-    reranker.close()
-
 
 # @pytest.mark.vcr
 @pytest.mark.skip  # odd but https://github.com/mudler/LocalAI/issues/6700
-async def test_localai_rerank_internal_top_n_async() -> None:
-    reranker = LocalAIRerank(
-        openai_api_key="foo",
-        model="bge-reranker-v2-m3",
-        openai_api_base="https://foo.bar/",
-    )
-
+async def test_localai_rerank_internal_top_n_async(reranker: LocalAIRerank) -> None:
     raw_docs = ["foo bar", "moo foo", "another document"]
     res = await reranker._rerank_async(raw_docs, query="foo", top_n=2)
     assert isinstance(res, list)
@@ -113,5 +99,3 @@ async def test_localai_rerank_internal_top_n_async() -> None:
         assert "index" in entry and "relevance_score" in entry
         assert isinstance(entry["index"], int)
         assert isinstance(entry["relevance_score"], (float, int))
-
-    await reranker.aclose()
@@ -1,8 +1,38 @@
+import asyncio
+import copy
+import json
+from types import SimpleNamespace
+from typing import Any, List
+
 import pytest
+from pydantic import ValidationError
 
 from langchain_localai import LocalAIEmbeddings
 
 
+class _FakeEmbeddingsClient:
+    """Stands in for ``openai.OpenAI().embeddings``; embeds "3" as [3.0]."""
+
+    def __init__(self) -> None:
+        self.inputs: List[List[str]] = []
+        self.models: List[str] = []
+
+    def _response(self, input: List[str], model: str = "") -> Any:
+        self.inputs.append(list(input))
+        self.models.append(model)
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=[float(t)]) for t in input]
+        )
+
+    def create(self, *, input: List[str], **kwargs: Any) -> Any:
+        return self._response(input, kwargs["model"])
+
+
+class _FakeAsyncEmbeddingsClient(_FakeEmbeddingsClient):
+    async def create(self, *, input: List[str], **kwargs: Any) -> Any:  # type: ignore[override]
+        return self._response(input, kwargs["model"])
+
+
 @pytest.mark.requires("openai")
 def test_localai_invalid_model_kwargs() -> None:
     with pytest.raises(ValueError):
@@ -14,6 +44,7 @@ def test_localai_incorrect_field() -> None:
     with pytest.warns(match="not default parameter"):
         llm = LocalAIEmbeddings(foo="bar", openai_api_key="foo")  # type: ignore[call-arg]
     assert llm.model_kwargs == {"foo": "bar"}
+    assert llm._invocation_params == {"model": llm.model, "foo": "bar"}
 
 
 @pytest.mark.requires("openai")
@@ -64,3 +95,250 @@ def test_localai_proxy() -> None:
             async_client=openai.AsyncClient(api_key="foo"),
             openai_proxy="http://localhost:6666",
         )
+
+
+@pytest.mark.requires("openai")
+def test_localai_embed_documents_chunk_size() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        client=(client := _FakeEmbeddingsClient()),
+        chunk_size=2,
+    )
+    texts = [str(i) for i in range(5)]
+    assert llm.embed_documents(texts) == [[float(i)] for i in range(5)]
+    assert client.inputs == [["0", "1"], ["2", "3"], ["4"]]
+    client.inputs.clear()
+    assert llm.embed_documents(texts, chunk_size=3) == [[float(i)] for i in range(5)]
+    assert client.inputs == [["0", "1", "2"], ["3", "4"]]
+    client.inputs.clear()
+    texts = [str(i) for i in range(1001)]
+    assert len(llm.embed_documents(texts, chunk_size=2000)) == 1001
+    assert [len(batch) for batch in client.inputs] == [1000, 1]
+
+
+@pytest.mark.requires("openai")
+async def test_localai_aembed_documents_chunk_size() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        async_client=(client := _FakeAsyncEmbeddingsClient()),
+        chunk_size=2,
+    )
+    texts = [str(i) for i in range(5)]
+    assert await llm.aembed_documents(texts) == [[float(i)] for i in range(5)]
+    assert client.inputs == [["0", "1"], ["2", "3"], ["4"]]
+
+
+@pytest.mark.requires("openai")
+async def test_localai_aembed_documents_max_concurrency() -> None:
+    in_flight = peak = 0
+
+    class _SlowClient(_FakeAsyncEmbeddingsClient):
+        async def create(self, *, input: List[str], **kwargs: Any) -> Any:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return self._response(input)
+
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        async_client=_SlowClient(),
+        chunk_size=1,
+        max_concurrency=3,
+    )
+    texts = [str(i) for i in range(10)]
+    assert await llm.aembed_documents(texts) == [[float(i)] for i in range(10)]
+    assert peak == 3
+
+
+@pytest.mark.requires("openai")
+def test_localai_embeddings_concurrency_must_be_positive() -> None:
+    with pytest.raises(ValidationError):
+        LocalAIEmbeddings(openai_api_key="foo", max_concurrency=0)
+    with pytest.raises(ValidationError):
+        LocalAIEmbeddings(openai_api_key="foo", max_workers=0)
+
+
+@pytest.mark.requires("openai")
+def test_localai_embed_documents_threads_keep_order() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        client=(client := _FakeEmbeddingsClient()),
+        chunk_size=1,
+        max_workers=4,
+    )
+    texts = [str(i) for i in range(20)]
+    assert llm.embed_documents(texts) == [[float(i)] for i in range(20)]
+    assert sorted(client.inputs) == sorted([t] for t in texts)
+
+
+@pytest.mark.requires("openai")
+def test_localai_embed_documents_token_budget() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        client=(client := _FakeEmbeddingsClient()),
+        max_tokens_per_batch=2,
+    )
+    # every 4 trailing spaces count as a token, longer texts are sent last
+    texts = ["1" + " " * 11, "2", "3" + " " * 7, "4", "5" + " " * 7]
+    assert llm.embed_documents(texts) == [[float(i)] for i in range(1, 6)]
+    assert client.inputs == [["2", "4", texts[2]], [texts[4]], [texts[0]]]
+
+
+@pytest.mark.requires("openai")
+def test_localai_embed_documents_deduplicates() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo", client=(client := _FakeEmbeddingsClient())
+    )
+    out = llm.embed_documents(["1", "2", "1", "3", "2"])
+    assert out == [[1.0], [2.0], [1.0], [3.0], [2.0]]
+    assert out[0] is not out[2]
+    assert client.inputs == [["1", "2", "3"]]
+
+
+@pytest.mark.requires("openai")
+async def test_localai_aembed_documents_deduplicates() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo", async_client=(client := _FakeAsyncEmbeddingsClient())
+    )
+    out = await llm.aembed_documents(["1", "1", "2"])
+    assert out == [[1.0], [1.0], [2.0]]
+    assert out[0] is not out[1]
+    assert client.inputs == [["1", "2"]]
+
+
+@pytest.mark.requires("openai")
+async def test_localai_embed_query_cache() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        client=(client := _FakeEmbeddingsClient()),
+        async_client=(aclient := _FakeAsyncEmbeddingsClient()),
+        query_cache_size=2,
+    )
+    assert llm.embed_query("1") == [1.0]
+    assert await llm.aembed_query("1") == [1.0]
+    assert llm.embed_query("2") == [2.0]
+    assert llm.embed_query("3") == [3.0]  # evicts "1"
+    assert await llm.aembed_query("1") == [1.0]
+    assert client.inputs == [["1"], ["2"], ["3"]]
+    assert aclient.inputs == [["1"]]
+
+
+@pytest.mark.requires("openai")
+def test_localai_embed_query_cache_disabled() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        client=(client := _FakeEmbeddingsClient()),
+        query_cache_size=0,
+    )
+    assert llm.embed_query("1") == llm.embed_query("1")
+    assert client.inputs == [["1"], ["1"]]
+
+
+@pytest.mark.requires("openai")
+async def test_localai_embeddings_follow_reassigned_model() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        model="a",
+        client=(client := _FakeEmbeddingsClient()),
+        async_client=(aclient := _FakeAsyncEmbeddingsClient()),
+    )
+    assert llm.embed_query("1") == [1.0]
+    llm.model = "b"
+    assert llm.embed_query("1") == [1.0]
+    copied = llm.model_copy(update={"model": "c"})
+    assert copied._query_cache is not llm._query_cache
+    assert copied.embed_documents(["1", "2"]) == [[1.0], [2.0]]
+    assert await copied.aembed_query("2") == [2.0]
+    assert client.models == ["a", "b", "c"]
+    assert aclient.models == ["c"]
+    # the copy caches its queries under its own model
+    assert llm._query_cache.get(("c", "2")) is None
+    assert copied._query_cache.get(("c", "2")) == (2.0,)
+    assert copy.copy(llm)._query_cache is not llm._query_cache
+
+
+@pytest.mark.requires("openai")
+async def test_localai_embed_queries_single_request() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        client=(client := _FakeEmbeddingsClient()),
+        async_client=(aclient := _FakeAsyncEmbeddingsClient()),
+    )
+    assert llm.embed_query("2") == [2.0]
+    out = llm.embed_queries(["1", "2", "3", "1"])
+    assert out == [[1.0], [2.0], [3.0], [1.0]]
+    assert out[0] is not out[3]
+    assert client.inputs == [["2"], ["1", "3"]]
+    assert await llm.aembed_queries(["3", "4", "5"]) == [[3.0], [4.0], [5.0]]
+    assert aclient.inputs == [["4", "5"]]
+
+
+@pytest.mark.requires("openai")
+async def test_localai_aembed_query_coalesces_concurrent_calls() -> None:
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        async_client=(client := _FakeAsyncEmbeddingsClient()),
+        coalesce_ms=5,
+        max_coalesce_batch=3,
+    )
+    texts = [str(i) for i in range(5)]
+    results = await asyncio.gather(*(llm.aembed_query(t) for t in texts))
+    assert results == [[float(i)] for i in range(5)]
+    assert client.inputs == [["0", "1", "2"], ["3", "4"]]
+    # cached queries do not wait for the window
+    assert await llm.aembed_query("4") == [4.0]
+    assert len(client.inputs) == 2
+
+
+@pytest.mark.requires("openai")
+def test_localai_embed_documents_retries_failed_batch_only() -> None:
+    import httpx
+    import openai
+
+    requests: List[List[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        texts = json.loads(request.content)["input"]
+        requests.append(texts)
+        if texts == ["2"] and requests.count(["2"]) == 1:
+            return httpx.Response(500, headers={"retry-after-ms": "1"})
+        data = [
+            {"object": "embedding", "index": i, "embedding": [float(t)]}
+            for i, t in enumerate(texts)
+        ]
+        return httpx.Response(
+            200,
+            json={"object": "list", "data": data, "model": "m", "usage": {}},
+        )
+
+    client = openai.OpenAI(
+        api_key="foo",
+        base_url="http://x",
+        max_retries=1,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo", client=client.embeddings, chunk_size=1
+    )
+    assert llm.embed_documents(["1", "2", "3"]) == [[1.0], [2.0], [3.0]]
+    assert sorted(requests) == [["1"], ["2"], ["2"], ["3"]]
+
+
+@pytest.mark.requires("numpy")
+async def test_localai_embed_documents_return_numpy() -> None:
+    np = pytest.importorskip("numpy")
+    llm = LocalAIEmbeddings(
+        openai_api_key="foo",
+        client=_FakeEmbeddingsClient(),
+        async_client=_FakeAsyncEmbeddingsClient(),
+        return_numpy=True,
+    )
+    embeddings = llm.embed_documents(["1", "2", "1"])
+    assert isinstance(embeddings, np.ndarray)
+    assert embeddings.dtype == np.float32
+    assert embeddings.tolist() == [[1.0], [2.0], [1.0]]
+    aembeddings = await llm.aembed_documents(["1", "2"])
+    assert isinstance(aembeddings, np.ndarray)
+    assert aembeddings.tolist() == [[1.0], [2.0]]
@@ -1,8 +1,27 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List
+
+import httpx
 import pytest
+import pytest_asyncio
 from langchain_core.documents import Document
 from pydantic import ValidationError
 
-from langchain_localai import LocalAIRerank
+from langchain_localai import LocalAIRerank, localai_rerank
+
+
+@pytest_asyncio.fixture(scope="module")
+async def reranker() -> AsyncIterator[LocalAIRerank]:
+    """A reranker shared by the tests of this module, not to be reconfigured."""
+    async with LocalAIRerank(
+        openai_api_key="k", openai_api_base="http://x"
+    ) as reranker:
+        yield reranker
 
 
 def test_localai_rerank_base_url() -> None:
@@ -10,52 +29,126 @@ def test_localai_rerank_base_url() -> None:
         openai_api_key="random-string", openai_api_base="http://localhost:8080"
     )
     assert reranker.openai_api_base == "http://localhost:8080"
+    assert reranker._rerank_url == "http://localhost:8080/v1/rerank"
+    assert reranker._rerank_url is reranker._rerank_url
+    reranker = LocalAIRerank(openai_api_key="k", openai_api_base="http://x:8080/")
+    assert reranker._rerank_url == "http://x:8080/v1/rerank"
+    reranker.openai_api_base = "http://y"
+    assert reranker._rerank_url == "http://y/v1/rerank"
+
 
+def test_localai_rerank_top_n_validation() -> None:
+    # top_n has ge=1 constraint; creating with 0 should raise ValidationError
+    with pytest.raises(ValidationError):
+        LocalAIRerank(top_n=0)  # type: ignore[arg-type]
 
-def test_localai_rerank_sync_client_headers() -> None:
-    reranker = LocalAIRerank(openai_api_key="secret", openai_api_base="http://x")
-    client = reranker._get_sync_client()
-    # httpx stores headers in .headers and the Authorization header should be set
-    assert client.headers.get("Authorization") == "Bearer secret"
-    assert client.headers.get("Content-Type") == "application/json"
-    # cleanup
+
+def test_payload_shape() -> None:
+    reranker = LocalAIRerank(
+        openai_api_key="k", openai_api_base="http://x", model="m", top_n=2
+    )
+    assert reranker._base_payload() == {"model": "m", "top_n": 2}
+    assert reranker._base_payload(model="other", top_n=5) == {
+        "model": "other",
+        "top_n": 5,
+    }
+    assert reranker._base_payload(top_n=0)["top_n"] == 2
+    sent: List[Dict[str, Any]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={"results": []})
+
+    reranker.transport = httpx.MockTransport(handler)
+    reranker.rerank_batch_size = 2
+    reranker._rerank_sync(["a", "bb", "ccc"], "q")
+    # the batches are sent by concurrent threads
+    assert sorted(sent, key=lambda payload: len(payload["documents"])) == [
+        {"query": "q", "documents": ["ccc"], "model": "m", "top_n": 2},
+        {"query": "q", "documents": ["a", "bb"], "model": "m", "top_n": 2},
+    ]
     reranker.close()
 
 
-@pytest.mark.asyncio
-async def test_localai_rerank_async_client_headers() -> None:
-    reranker = LocalAIRerank(openai_api_key="secret", openai_api_base="http://x")
-    client = await reranker._get_async_client()
-    assert client.headers.get("Authorization") == "Bearer secret"
-    assert client.headers.get("Content-Type") == "application/json"
-    # cleanup
-    await reranker.aclose()
+def test_localai_rerank_follows_reassigned_fields() -> None:
+    sent: List[Dict[str, Any]] = []
 
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        sent.append(payload)
+        results = [
+            {"index": i, "relevance_score": 1.0 - i / 10}
+            for i in range(len(payload["documents"]))
+        ]
+        return httpx.Response(200, json={"results": results[: payload["top_n"]]})
 
-def test_localai_rerank_top_n_validation() -> None:
-    # top_n has ge=1 constraint; creating with 0 should raise ValidationError
-    with pytest.raises(ValidationError):
-        LocalAIRerank(top_n=0)  # type: ignore[arg-type]
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        transport=httpx.MockTransport(handler),
+    )
+    docs = [Document(page_content=str(i)) for i in range(4)]
+    assert len(reranker.compress_documents(docs, "query")) == 3
 
+    reranker.top_n = 1
+    assert len(reranker.compress_documents(docs, "query")) == 1
+    assert sent[-1]["top_n"] == 1
+
+    copied = reranker.model_copy(update={"top_n": 2, "model": "other"})
+    assert len(copied.compress_documents(docs, "query")) == 2
+    assert (sent[-1]["model"], sent[-1]["top_n"]) == ("other", 2)
+    copied.close()
+    # cached results are keyed by top_n, the first call is served again
+    reranker.top_n = 3
+    assert len(reranker.compress_documents(docs, "query")) == 3
+    assert len(sent) == 3
+    reranker.close()
 
-def test_localai_rerank_empty_documents_compress_returns_empty() -> None:
-    reranker = LocalAIRerank(openai_api_key="k", openai_api_base="http://x")
+
+def test_localai_rerank_empty_documents_compress_returns_empty(
+    reranker: LocalAIRerank,
+) -> None:
     # compress_documents should handle empty input without network calls
     # and return empty list
     res = reranker.compress_documents([], "query")
     assert res == []
 
 
-@pytest.mark.asyncio
-async def test_localai_rerank_async_empty_documents_returns_empty() -> None:
-    reranker = LocalAIRerank(openai_api_key="k", openai_api_base="http://x")
+async def test_localai_rerank_async_empty_documents_returns_empty(
+    reranker: LocalAIRerank,
+) -> None:
     res = await reranker.acompress_documents([], "query")
     assert res == []
 
 
+async def test_localai_rerank_single_doc_no_network() -> None:
+    sent: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(500)
+
+    transport = httpx.MockTransport(handler)
+    async with LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        transport=transport,
+        async_transport=transport,
+    ) as reranker:
+        doc = Document(page_content="only", metadata={"source": "a"})
+
+        for compressed in (
+            reranker.compress_documents([doc], "query"),
+            await reranker.acompress_documents([doc], "query"),
+        ):
+            assert [d.page_content for d in compressed] == ["only"]
+            assert compressed[0].metadata == {"source": "a", "relevance_score": 1.0}
+        assert doc.metadata == {"source": "a"}
+        assert sent == []
+
+
 @pytest.mark.requires("openai")
-def test_build_compressed_docs_adds_relevance_score() -> None:
-    reranker = LocalAIRerank(openai_api_key="k", openai_api_base="http://x")
+def test_build_compressed_docs_adds_relevance_score(reranker: LocalAIRerank) -> None:
     docs = [
         Document(page_content="doc0", metadata={"id": 0}),
         Document(page_content="doc1", metadata={"id": 1}),
@@ -69,3 +162,350 @@ def test_build_compressed_docs_adds_relevance_score() -> None:
     assert out.metadata["id"] == 1
     assert "relevance_score" in out.metadata
     assert out.metadata["relevance_score"] == 0.9123
+    # the original document is left untouched
+    assert docs[1].metadata == {"id": 1}
+
+
+@pytest.mark.parametrize("n", [10, 100, 1000])
+@pytest.mark.parametrize("shuffled", [False, True])
+def test_build_compressed_docs_orders_by_score(n: int, shuffled: bool) -> None:
+    reranker = LocalAIRerank(
+        openai_api_key="k", openai_api_base="http://x", trust_server_ordering=False
+    )
+    docs = [Document(page_content=f"doc{i}", metadata={"id": i}) for i in range(n)]
+    results = [{"index": i, "relevance_score": i / n} for i in reversed(range(n))]
+    if shuffled:
+        random.Random(n).shuffle(results)
+    compressed = reranker._build_compressed_docs(docs, results)
+    assert [doc.metadata["id"] for doc in compressed] == list(reversed(range(n)))
+    assert [doc.metadata["relevance_score"] for doc in compressed] == [
+        i / n for i in reversed(range(n))
+    ]
+
+
+def test_build_compressed_docs_trusts_server_ordering(
+    reranker: LocalAIRerank, caplog: pytest.LogCaptureFixture
+) -> None:
+    docs = [Document(page_content=f"doc{i}") for i in range(3)]
+    results = [
+        {"index": 0, "relevance_score": 0.1},
+        {"index": 2, "relevance_score": 0.9},
+        {"index": 1, "relevance_score": 0.5},
+    ]
+    with caplog.at_level(logging.DEBUG, logger="langchain_localai.localai_rerank"):
+        compressed = reranker._build_compressed_docs(docs, results)
+    assert [doc.page_content for doc in compressed] == ["doc0", "doc2", "doc1"]
+    assert "not sorted by relevance_score" in caplog.text
+
+
+def test_localai_rerank_sends_documents_sorted_by_length() -> None:
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        documents = json.loads(request.content)["documents"]
+        sent.append(documents)
+        # score the longest documents first
+        results = [
+            {"index": i, "relevance_score": float(len(documents[i]))}
+            for i in reversed(range(len(documents)))
+        ]
+        return httpx.Response(200, json={"results": results})
+
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        transport=httpx.MockTransport(handler),
+    )
+    docs = [
+        Document(page_content="medium", metadata={"id": 0}),
+        Document(page_content="the longest one", metadata={"id": 1}),
+        Document(page_content="s", metadata={"id": 2}),
+    ]
+    compressed = reranker.compress_documents(docs, "query")
+    assert sent == [["s", "medium", "the longest one"]]
+    assert [doc.metadata["id"] for doc in compressed] == [1, 0, 2]
+    assert compressed[0].metadata["relevance_score"] == 15.0
+    reranker.close()
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_localai_rerank_json_body(
+    monkeypatch: pytest.MonkeyPatch, use_orjson: bool
+) -> None:
+    if use_orjson:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(localai_rerank, "_HAS_ORJSON", use_orjson)
+    sent: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(
+            200, json={"results": [{"index": 1, "relevance_score": 0.5}]}
+        )
+
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        model="m",
+        top_n=1,
+        transport=httpx.MockTransport(handler),
+    )
+    documents = ["ünïcode", '日本語 "quoted"']
+    assert reranker._rerank_sync(documents, "query") == [
+        {"index": 1, "relevance_score": 0.5}
+    ]
+    assert sent[0].headers["Content-Type"] == "application/json"
+    assert json.loads(sent[0].content) == {
+        "model": "m",
+        "query": "query",
+        "documents": sorted(documents, key=len),
+        "top_n": 1,
+    }
+    reranker.close()
+
+
+def _score_by_number_handler(
+    sent: List[List[str]],
+) -> Callable[[httpx.Request], httpx.Response]:
+    """Serve rerank requests, scoring documents "0", "1"... by their number."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        sent.append(payload["documents"])
+        results = sorted(
+            (
+                {"index": i, "relevance_score": float(doc)}
+                for i, doc in enumerate(payload["documents"])
+            ),
+            key=lambda r: -r["relevance_score"],
+        )
+        return httpx.Response(200, json={"results": results[: payload["top_n"]]})
+
+    return handler
+
+
+def test_localai_rerank_splits_large_requests() -> None:
+    sent: List[List[str]] = []
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        rerank_batch_size=2,
+        transport=httpx.MockTransport(_score_by_number_handler(sent)),
+    )
+    docs = [Document(page_content=str(i)) for i in [3, 0, 4, 1, 2]]
+    compressed = reranker.compress_documents(docs, "query")
+    # the batches are sent from several threads
+    assert sorted(sent) == [["2"], ["3", "0"], ["4", "1"]]
+    assert [doc.page_content for doc in compressed] == ["4", "3", "2"]
+    reranker.close()
+
+
+def test_localai_rerank_sync_max_workers() -> None:
+    sent: List[List[str]] = []
+    score = _score_by_number_handler(sent)
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return score(request)
+
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        rerank_batch_size=2,
+        max_workers=2,
+        transport=httpx.MockTransport(handler),
+    )
+    docs = [Document(page_content=str(i)) for i in range(8)]
+    compressed = reranker.compress_documents(docs, "query")
+    assert len(sent) == 4
+    assert peak == 2
+    assert [doc.page_content for doc in compressed] == ["7", "6", "5"]
+    reranker.close()
+
+
+async def test_localai_rerank_async_splits_large_requests() -> None:
+    sent: List[List[str]] = []
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        rerank_batch_size=2,
+        async_transport=httpx.MockTransport(_score_by_number_handler(sent)),
+    )
+    docs = [Document(page_content=str(i)) for i in [3, 0, 4, 1, 2]]
+    compressed = await reranker.acompress_documents(docs, "query")
+    assert sorted(sent) == [["2"], ["3", "0"], ["4", "1"]]
+    assert [doc.page_content for doc in compressed] == ["4", "3", "2"]
+    await reranker.aclose()
+
+
+async def test_localai_rerank_caches_results() -> None:
+    sent: List[List[str]] = []
+    transport = httpx.MockTransport(_score_by_number_handler(sent))
+    async with LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        transport=transport,
+        async_transport=transport,
+    ) as reranker:
+        docs = [Document(page_content=str(i)) for i in [3, 0, 4, 1, 2]]
+
+        first = reranker.compress_documents(docs, "query")
+        assert reranker.compress_documents(docs, "query") == first
+        assert await reranker.acompress_documents(docs, "query") == first
+        assert len(sent) == 1
+
+        await reranker.acompress_documents(docs, "other query")
+        reranker.compress_documents(docs[:4], "query")
+        assert len(sent) == 3
+
+
+async def test_localai_rerank_coalesces_concurrent_calls() -> None:
+    sent: List[List[str]] = []
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        top_n=2,
+        coalesce_ms=20,
+        async_transport=httpx.MockTransport(_score_by_number_handler(sent)),
+    )
+    slices = [[3, 0, 4], [1, 9], [7, 2, 5, 6], [8, 10]]
+
+    compressed = await asyncio.gather(
+        *(
+            reranker.acompress_documents(
+                [Document(page_content=str(i)) for i in numbers], "query"
+            )
+            for numbers in slices
+        )
+    )
+    assert len(sent) == 1
+    assert [[doc.page_content for doc in docs] for docs in compressed] == [
+        ["4", "3"],
+        ["9", "1"],
+        ["7", "6"],
+        ["10", "8"],
+    ]
+    await reranker.aclose()
+
+
+_RESULTS_BODY = json.dumps(
+    {
+        "model": "m",
+        "results": [
+            {"index": 1, "document": {"text": "b"}, "relevance_score": 0.75},
+            {"index": 0, "document": {"text": "a"}, "relevance_score": 0.25},
+        ],
+    }
+).encode()
+
+
+def _chunks(body: bytes, size: int = 7) -> Iterator[bytes]:
+    for i in range(0, len(body), size):
+        yield body[i : i + size]
+
+
+async def _achunks(body: bytes, size: int = 7) -> AsyncIterator[bytes]:
+    for chunk in _chunks(body, size):
+        yield chunk
+
+
+async def test_localai_rerank_stream_responses() -> None:
+    pytest.importorskip("ijson")
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        stream_responses=True,
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=_chunks(_RESULTS_BODY))
+        ),
+        async_transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=_achunks(_RESULTS_BODY))
+        ),
+    )
+    expected = [
+        {"index": 1, "document": {"text": "b"}, "relevance_score": 0.75},
+        {"index": 0, "document": {"text": "a"}, "relevance_score": 0.25},
+    ]
+    async with reranker:
+        assert reranker._rerank_sync(["a", "b"], "query") == expected
+        assert await reranker._rerank_async(["a", "b"], "query") == expected
+
+
+@pytest.mark.parametrize("stream_responses", [False, True])
+async def test_localai_rerank_error_detail(stream_responses: bool) -> None:
+    if stream_responses:
+        pytest.importorskip("ijson")
+    body = b'{"detail":"model not loaded"}'
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        stream_responses=stream_responses,
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=_chunks(body))
+        ),
+        async_transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=_achunks(body))
+        ),
+    )
+    async with reranker:
+        with pytest.raises(RuntimeError, match="model not loaded"):
+            reranker._rerank_sync(["a", "b"], "query")
+        with pytest.raises(RuntimeError, match="model not loaded"):
+            await reranker._rerank_async(["a", "b"], "query")
+
+
+def _rate_limited_handler(
+    sent: List[float], limited: int
+) -> Callable[[httpx.Request], httpx.Response]:
+    """Answer 429 to the first ``limited`` requests, recording request times."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(time.monotonic())
+        if len(sent) <= limited:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(
+            200, json={"results": [{"index": 0, "relevance_score": 1}]}
+        )
+
+    return handler
+
+
+def test_localai_rerank_retries_rate_limited_requests() -> None:
+    sent: List[float] = []
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        transport=httpx.MockTransport(_rate_limited_handler(sent, limited=2)),
+    )
+    assert reranker._rerank_sync(["a"], "query") == [{"index": 0, "relevance_score": 1}]
+    assert len(sent) == 3
+
+    sent.clear()
+    reranker.max_retries = 1
+    with pytest.raises(httpx.HTTPStatusError):
+        reranker._rerank_sync(["a"], "query")
+    assert len(sent) == 2
+    reranker.close()
+
+
+async def test_localai_rerank_async_rate_limit() -> None:
+    sent: List[float] = []
+    reranker = LocalAIRerank(
+        openai_api_key="k",
+        openai_api_base="http://x",
+        rate_limit_per_sec=20,
+        async_transport=httpx.MockTransport(_rate_limited_handler(sent, limited=1)),
+    )
+    await reranker._rerank_async(["a"], "query")
+    await reranker._rerank_async(["a"], "query")
+    assert len(sent) == 3
+    assert sent[2] - sent[0] >= 0.09
+    await reranker.aclose()
@@ -0,0 +1,272 @@
+import asyncio
+import copy
+import gc
+import pickle
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List
+
+import httpx
+import pytest
+
+from langchain_localai import LocalAIRerank
+
+
+def _empty_results(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"results": []})
+
+
+def test_localai_rerank_sync_client_headers() -> None:
+    reranker = LocalAIRerank(
+        openai_api_key="secret",
+        openai_api_base="http://x",
+        transport=httpx.MockTransport(_empty_results),
+    )
+    client = reranker._get_sync_client()
+    # httpx stores headers in .headers and the Authorization header should be set
+    assert client.headers.get("Authorization") == "Bearer secret"
+    assert client.headers.get("Content-Type") == "application/json"
+    request = client.post("http://x/v1/rerank").request
+    assert request.headers["Authorization"] == "Bearer secret"
+    # cleanup
+    reranker.close()
+
+
+@pytest.mark.asyncio
+async def test_localai_rerank_async_client_headers() -> None:
+    reranker = LocalAIRerank(
+        openai_api_key="secret",
+        openai_api_base="http://x",
+        async_transport=httpx.MockTransport(_empty_results),
+    )
+    client = await reranker._get_async_client()
+    assert client.headers.get("Authorization") == "Bearer secret"
+    assert client.headers.get("Content-Type") == "application/json"
+    request = (await client.post("http://x/v1/rerank")).request
+    assert request.headers["Authorization"] == "Bearer secret"
+    # cleanup
+    await reranker.aclose()
+
+
+def test_localai_rerank_client_timeout() -> None:
+    reranker = LocalAIRerank(openai_api_key="secret", openai_api_base="http://x")
+    timeout = reranker._get_sync_client().timeout
+    assert timeout.read == 60.0
+    assert timeout.connect == timeout.pool == 2.0
+    assert timeout.write == 10.0
+    reranker.close()
+
+
+@pytest.mark.asyncio
+async def test_localai_rerank_async_client_timeout() -> None:
+    reranker = LocalAIRerank(
+        openai_api_key="secret", openai_api_base="http://x", timeout_read=120
+    )
+    client = await reranker._get_async_client()
+    assert client.timeout.read == 120.0
+    await reranker.aclose()
+
+
+def test_localai_rerank_client_limits() -> None:
+    reranker = LocalAIRerank(
+        openai_api_key="secret",
+        openai_api_base="http://x",
+        max_connections=8,
+        max_keepalive_connections=4,
+    )
+    client = reranker._get_sync_client()
+    assert reranker._get_sync_client() is client
+    pool = client._transport._pool  # type: ignore[attr-defined]
+    assert pool._max_connections == 8
+    assert pool._max_keepalive_connections == 4
+    reranker.close()
+
+
+def test_http2_enabled() -> None:
+    pytest.importorskip("h2")
+    reranker = LocalAIRerank(openai_api_key="secret", openai_api_base="http://x")
+    client = reranker._get_sync_client()
+    assert client._transport._pool._http2 is True  # type: ignore[attr-defined]
+    reranker.close()
+    reranker = LocalAIRerank(
+        openai_api_key="secret", openai_api_base="http://x", http2=False
+    )
+    client = reranker._get_sync_client()
+    assert client._transport._pool._http2 is False  # type: ignore[attr-defined]
+    reranker.close()
+
+
+@pytest.mark.asyncio
+async def test_http2_enabled_async() -> None:
+    pytest.importorskip("h2")
+    reranker = LocalAIRerank(openai_api_key="secret", openai_api_base="http://x")
+    client = await reranker._get_async_client()
+    assert client._transport._pool._http2 is True  # type: ignore[attr-defined]
+    await reranker.aclose()
+
+
+class _RerankHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = b'{"results": []}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.mark.enable_socket
+def test_localai_rerank_async_client_per_event_loop() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RerankHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    reranker = LocalAIRerank(
+        openai_api_key="secret",
+        openai_api_base=f"http://127.0.0.1:{server.server_port}",
+    )
+
+    async def get_clients() -> List[httpx.AsyncClient]:
+        clients = [await reranker._get_async_client() for _ in range(2)]
+        # keep a connection in the pool, which refers to the loop
+        await reranker._rerank_async(["a", "b"], "query")
+        return clients
+
+    try:
+        first, same = asyncio.run(get_clients())
+        assert first is same
+        assert first._transport._pool.connections  # type: ignore[attr-defined]
+        second, _ = asyncio.run(get_clients())
+        assert second is not first
+        # the client of the closed loop is dropped along with its connections
+        assert list(reranker._async_clients.values()) == [second]
+        assert not first._transport._pool.connections  # type: ignore[attr-defined]
+    finally:
+        asyncio.run(reranker.aclose())
+        with warnings.catch_warnings():
+            # the sockets of closed loops are closed once they are collected
+            warnings.simplefilter("ignore", ResourceWarning)
+            gc.collect()
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+def test_localai_rerank_async_clients_of_threads() -> None:
+    reranker = LocalAIRerank(openai_api_key="secret", openai_api_base="http://x")
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+
+        def get_other_client() -> httpx.AsyncClient:
+            return asyncio.run_coroutine_threadsafe(
+                reranker._get_async_client(), other_loop
+            ).result()
+
+        async def use_clients() -> None:
+            client = await reranker._get_async_client()
+            other = get_other_client()
+            # each loop keeps its client instead of replacing the other one
+            assert await reranker._get_async_client() is client
+            assert get_other_client() is other
+            assert other is not client
+            await reranker.aclose()
+            assert client.is_closed
+            assert other.is_closed
+
+        asyncio.run(use_clients())
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+def test_localai_rerank_sync_client_shared_across_threads() -> None:
+    reranker = LocalAIRerank(openai_api_key="secret", openai_api_base="http://x")
+    barrier = threading.Barrier(8)
+
+    def get_client() -> httpx.Client:
+        barrier.wait()
+        return reranker._get_sync_client()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: get_client(), range(8)))
+    assert all(client is clients[0] for client in clients)
+    reranker.close()
+
+
+def test_context_manager_closes_client() -> None:
+    with LocalAIRerank(openai_api_key="k", openai_api_base="http://x") as reranker:
+        client = reranker._get_sync_client()
+    assert client.is_closed
+    assert reranker._sync_client is None
+
+
+async def test_async_context_manager_closes_client() -> None:
+    async with LocalAIRerank(
+        openai_api_key="k", openai_api_base="http://x"
+    ) as reranker:
+        client = await reranker._get_async_client()
+    assert client.is_closed
+    assert not reranker._async_clients
+
+
+def test_localai_rerank_copies_get_own_clients() -> None:
+    reranker = LocalAIRerank(
+        openai_api_key="secret",
+        openai_api_base="http://x",
+        rate_limit_per_sec=10,
+        top_n=2,
+    )
+    client = reranker._get_sync_client()
+    copies = [
+        copy.deepcopy(reranker),
+        reranker.model_copy(deep=True),
+        pickle.loads(pickle.dumps(reranker)),
+    ]
+    for copied in copies:
+        assert copied.model_dump() == reranker.model_dump()
+        assert copied._sync_client is None
+        assert copied._client_lock is not reranker._client_lock
+        assert copied._rate_limiter is not None
+        assert copied._rate_limiter is not reranker._rate_limiter
+        assert copied._get_sync_client() is not client
+        copied.close()
+    assert reranker._sync_client is client
+    reranker.close()
+
+
+def test_localai_rerank_model_copy_uses_updated_endpoint() -> None:
+    sent: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return _empty_results(request)
+
+    reranker = LocalAIRerank(
+        openai_api_key="secret",
+        openai_api_base="http://x",
+        transport=httpx.MockTransport(handler),
+    )
+    reranker._rerank_sync(["a"], "query")
+    copied = reranker.model_copy(
+        update={"openai_api_base": "http://y:8080/", "openai_api_key": "other"}
+    )
+    copied._rerank_sync(["a"], "query")
+    assert [str(request.url) for request in sent] == [
+        "http://x/v1/rerank",
+        "http://y:8080/v1/rerank",
+    ]
+    assert sent[1].headers["Authorization"] == "Bearer other"
+    # the copy has its own client, closing it leaves the original usable
+    copied.close()
+    reranker._rerank_sync(["a"], "query")
+    assert sent[2].headers["Authorization"] == "Bearer secret"
+    reranker.close()